@@ -13,6 +13,27 @@ from datetime import datetime
 ZSCORE_THRESHOLD = 2.0
 HIGH_SEVERITY_THRESHOLD = 3.0
 
+# Fixed label sets for the categorical anomaly columns
+SEVERITY_LEVELS = ['normal', 'medium', 'high']
+DIRECTIONS = ['none', 'up', 'down']
+
+# Signal styling keyed by (severity, direction); anything else is DEFAULT_SIGNAL_TYPE
+SIGNAL_TYPES = pd.DataFrame(
+    [
+        ('high', 'down', 'critical', '⚠️', 'red', 'fund major drop detected'),
+        ('high', 'up', 'alert', '📈', 'yellow', 'fund unusual spike'),
+        ('medium', 'down', 'warning', '📉', 'orange', 'fund volatility alert'),
+        ('normal', 'down', 'warning', '📉', 'orange', 'fund volatility alert'),
+    ],
+    columns=['severity', 'direction', 'type', 'icon', 'color', 'title_suffix']
+)
+DEFAULT_SIGNAL_TYPE = {
+    'type': 'info',
+    'icon': '📊',
+    'color': 'blue',
+    'title_suffix': 'fund movement detected',
+}
+
 
 def detect_anomalies(
     df: pd.DataFrame,
@@ -26,60 +47,93 @@ def detect_anomalies(
         zscore_threshold: Threshold for anomaly detection
         
     Returns:
-        DataFrame with anomaly flags and metadata
+        DataFrame with anomaly flags and metadata (explanations are
+        generated on demand by the serializers, see _explain)
     """
     df = df.copy()
     
+    zscore = df['zscore'].to_numpy(dtype=float)
+    if 'abs_zscore' in df.columns:
+        abs_z = df['abs_zscore'].to_numpy(dtype=float)
+    else:
+        abs_z = np.abs(zscore)
+    
     # Mark anomalies
-    df['is_anomaly'] = df['zscore'].abs() > zscore_threshold
+    is_anomaly = abs_z > zscore_threshold
+    df['is_anomaly'] = is_anomaly
     
     # Severity classification
-    df['severity'] = 'normal'
-    df.loc[df['zscore'].abs() > zscore_threshold, 'severity'] = 'medium'
-    df.loc[df['zscore'].abs() > HIGH_SEVERITY_THRESHOLD, 'severity'] = 'high'
+    severity = np.select(
+        [abs_z > HIGH_SEVERITY_THRESHOLD, abs_z > zscore_threshold],
+        ['high', 'medium'],
+        default='normal'
+    )
+    df['severity'] = pd.Categorical(severity, categories=SEVERITY_LEVELS)
     
     # Direction
-    df['anomaly_direction'] = 'none'
-    df.loc[(df['is_anomaly']) & (df['zscore'] > 0), 'anomaly_direction'] = 'up'
-    df.loc[(df['is_anomaly']) & (df['zscore'] < 0), 'anomaly_direction'] = 'down'
-    
-    # Generate explanations
-    df['explanation'] = df.apply(generate_explanation, axis=1)
-    
+    df['anomaly_direction'] = pd.Categorical(
+        np.where(
+            is_anomaly & (zscore > 0), 'up',
+            np.where(is_anomaly & (zscore < 0), 'down', 'none')
+        ),
+        categories=DIRECTIONS
+    )
+    
+    # Explanations are built lazily for the rows that get serialized
     return df
 
 
-def generate_explanation(row: pd.Series) -> str:
-    """Generate human-readable explanation for an anomaly."""
-    if not row.get('is_anomaly', False):
-        return "Normal market behavior"
-    
-    zscore = row.get('zscore', 0)
-    daily_return = row.get('daily_return', 0) * 100
-    severity = row.get('severity', 'medium')
-    
-    direction = "increase" if zscore > 0 else "decrease"
-    severity_text = "Significant" if severity == 'high' else "Moderate"
-    
-    explanations = [
-        f"{severity_text} NAV {direction} detected",
-        f"Unusual deviation from rolling mean (z-score: {abs(zscore):.1f})",
-    ]
-    
-    if abs(daily_return) > 3:
-        explanations.append(f"Daily return of {daily_return:.2f}% exceeds normal range")
-    
-    if severity == 'high':
-        explanations.append("Recommend immediate review")
-    
-    return ". ".join(explanations)
+def _explain(df: pd.DataFrame) -> np.ndarray:
+    """Build explanations for the rows of an anomaly-labelled frame."""
+    if 'daily_return' in df.columns:
+        daily_return = df['daily_return'].to_numpy(dtype=float)
+    else:
+        daily_return = np.zeros(len(df))
+    
+    return build_explanations(
+        df['zscore'].to_numpy(dtype=float),
+        daily_return,
+        df['is_anomaly'].to_numpy(dtype=bool),
+        df['severity'].to_numpy()
+    )
+
+
+def build_explanations(
+    zscore: np.ndarray,
+    daily_return: np.ndarray,
+    is_anomaly: np.ndarray,
+    severity: np.ndarray
+) -> np.ndarray:
+    """Generate human-readable explanations for whole columns of anomaly data."""
+    if len(zscore) == 0:
+        return np.array([], dtype=object)
+    
+    return_pct = daily_return * 100
+    severity_text = np.where(severity == 'high', 'Significant', 'Moderate')
+    direction = np.where(zscore > 0, 'increase', 'decrease')
+    
+    text = np.char.add(severity_text, ' NAV ')
+    text = np.char.add(text, direction)
+    text = np.char.add(text, ' detected. Unusual deviation from rolling mean (z-score: ')
+    text = np.char.add(text, np.char.mod('%.1f', np.abs(zscore)))
+    text = np.char.add(text, ')')
+    
+    return_text = np.char.add(
+        np.char.add('. Daily return of ', np.char.mod('%.2f', return_pct)),
+        '% exceeds normal range'
+    )
+    text = np.where(np.abs(return_pct) > 3, np.char.add(text, return_text), text)
+    text = np.where(severity == 'high', np.char.add(text, '. Recommend immediate review'), text)
+    
+    return np.where(is_anomaly, text, 'Normal market behavior').astype(object)
 
 
 def get_anomaly_summary(df: pd.DataFrame) -> Dict:
     """Get summary statistics for anomalies."""
-    anomalies = df[df['is_anomaly'] == True]
+    anom_mask = df['is_anomaly'].to_numpy(dtype=bool)
+    total_anomalies = int(np.count_nonzero(anom_mask))
     
-    if anomalies.empty:
+    if total_anomalies == 0:
         return {
             'total_anomalies': 0,
             'high_severity': 0,
@@ -90,14 +144,23 @@ def get_anomaly_summary(df: pd.DataFrame) -> Dict:
             'anomaly_rate': 0,
         }
     
+    def _count(column: str, value: str) -> int:
+        return int(np.count_nonzero(anom_mask & (df[column] == value).to_numpy(dtype=bool)))
+    
+    scheme_code = df['scheme_code']
+    if isinstance(scheme_code.dtype, pd.CategoricalDtype):
+        codes = scheme_code.cat.codes.to_numpy()
+    else:
+        codes = pd.factorize(scheme_code)[0]
+    
     return {
-        'total_anomalies': len(anomalies),
-        'high_severity': len(anomalies[anomalies['severity'] == 'high']),
-        'medium_severity': len(anomalies[anomalies['severity'] == 'medium']),
-        'up_movements': len(anomalies[anomalies['anomaly_direction'] == 'up']),
-        'down_movements': len(anomalies[anomalies['anomaly_direction'] == 'down']),
-        'affected_funds': anomalies['scheme_code'].nunique(),
-        'anomaly_rate': round(len(anomalies) / len(df) * 100, 2),
+        'total_anomalies': total_anomalies,
+        'high_severity': _count('severity', 'high'),
+        'medium_severity': _count('severity', 'medium'),
+        'up_movements': _count('anomaly_direction', 'up'),
+        'down_movements': _count('anomaly_direction', 'down'),
+        'affected_funds': int(np.unique(codes[anom_mask]).size),
+        'anomaly_rate': round(total_anomalies / len(df) * 100, 2),
     }
 
 
@@ -107,8 +170,6 @@ def get_recent_anomalies(
     limit: int = 50
 ) -> List[Dict]:
     """Get list of recent anomalies."""
-    df = df.copy()
-    
     # Ensure anomaly detection has been run
     if 'is_anomaly' not in df.columns:
         df = detect_anomalies(df)
@@ -122,32 +183,36 @@ def get_recent_anomalies(
         (df['date'] >= cutoff_date)
     ].sort_values('date', ascending=False)
     
-    anomalies = []
-    for _, row in recent.head(limit).iterrows():
-        scheme_code = str(row.get('scheme_code', ''))
-        fund_name = row.get('scheme_name', '')
-        if not isinstance(fund_name, str) or not fund_name.strip():
-            fund_name = scheme_code or 'Unknown'
-        category = row.get('category', '')
-        if not isinstance(category, str) or not category.strip():
-            category = 'Unknown'
+    recent = recent.head(limit)
+    scheme_code = recent['scheme_code'].astype(str)
+    
+    anomalies = pd.DataFrame({
+        'id': scheme_code + '_' + recent['date'].dt.strftime('%Y%m%d'),
+        'scheme_code': scheme_code,
+        'fund_name': _text_or_default(recent, 'scheme_name', scheme_code.replace('', 'Unknown')),
+        'category': _text_or_default(recent, 'category', 'Unknown'),
+        'date': recent['date'].dt.strftime('%Y-%m-%d'),
+        'timestamp': recent['date'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'nav': recent['nav'].round(4),
+        'daily_return': np.round(recent.get('daily_return', 0) * 100, 2),
+        'zscore': recent['zscore'].round(2),
+        'severity': recent['severity'],
+        'direction': recent['anomaly_direction'],
+        'explanation': _explain(recent),
+    })
+    
+    return anomalies.to_dict('records')
 
-        anomalies.append({
-            'id': f"{row['scheme_code']}_{row['date'].strftime('%Y%m%d')}",
-            'scheme_code': scheme_code,
-            'fund_name': fund_name,
-            'category': category,
-            'date': row['date'].strftime('%Y-%m-%d'),
-            'timestamp': row['date'].isoformat(),
-            'nav': round(row['nav'], 4),
-            'daily_return': round(row.get('daily_return', 0) * 100, 2),
-            'zscore': round(row['zscore'], 2),
-            'severity': row['severity'],
-            'direction': row['anomaly_direction'],
-            'explanation': row['explanation'],
-        })
-    
-    return anomalies
+
+def _text_or_default(df: pd.DataFrame, column: str, default) -> pd.Series:
+    """Return column values that are non-blank strings, else the default."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index)
+    
+    values = df[column]
+    codes, uniques = pd.factorize(values)
+    is_text = np.array([isinstance(v, str) and bool(v.strip()) for v in uniques] + [False])
+    return values.where(is_text[codes], default)
 
 
 def calculate_confidence_score(zscore: float) -> float:
@@ -163,13 +228,18 @@ def calculate_confidence_score(zscore: float) -> float:
     return round(confidence, 2)
 
 
+def _confidence_scores(zscore: pd.Series) -> pd.Series:
+    """Vectorized equivalent of calculate_confidence_score."""
+    abs_zscore = zscore.abs()
+    confidence = ((abs_zscore - ZSCORE_THRESHOLD) / 3.0).clip(upper=1.0)
+    return confidence.where(abs_zscore >= ZSCORE_THRESHOLD, 0.0).round(2)
+
+
 def get_anomaly_signals(df: pd.DataFrame, limit: int = 20) -> List[Dict]:
     """
     Generate trading-style signals from anomalies.
     Returns formatted signals for the signal feed.
     """
-    df = df.copy()
-    
     if 'is_anomaly' not in df.columns:
         df = detect_anomalies(df)
     
@@ -180,123 +250,110 @@ def get_anomaly_signals(df: pd.DataFrame, limit: int = 20) -> List[Dict]:
         (df['date'] >= max_date - pd.Timedelta(days=3))
     ].sort_values('date', ascending=False)
     
-    signals = []
-    for _, row in recent.head(limit).iterrows():
-        scheme_code = str(row.get('scheme_code', ''))
-        fund_name = row.get('scheme_name', '')
-        if not isinstance(fund_name, str) or not fund_name.strip():
-            fund_name = scheme_code or 'Unknown'
-        category = row.get('category', '')
-        if not isinstance(category, str) or not category.strip():
-            category = 'Unknown'
-        signal_type = _determine_signal_type(row)
-        
-        signals.append({
-            'id': f"sig_{row['scheme_code']}_{row['date'].strftime('%Y%m%d%H%M')}",
-            'timestamp': row['date'].isoformat(),
-            'type': signal_type['type'],
-            'icon': signal_type['icon'],
-            'color': signal_type['color'],
-            'title': signal_type['title'],
-            'fund_name': fund_name,
-            'scheme_code': scheme_code,
-            'category': category,
-            'message': row['explanation'],
-            'severity': row['severity'],
-            'confidence': calculate_confidence_score(row['zscore']),
-            'metrics': {
-                'nav': round(row['nav'], 4),
-                'change': round(row.get('daily_return', 0) * 100, 2),
-                'zscore': round(row['zscore'], 2),
-            }
-        })
-    
-    return signals
+    recent = recent.head(limit)
+    if recent.empty:
+        return []
+    
+    scheme_code = recent['scheme_code'].astype(str)
+    category = _text_or_default(recent, 'category', 'Unknown')
+    signal_types = _determine_signal_types(recent, category)
+    metrics = pd.DataFrame({
+        'nav': recent['nav'].round(4),
+        'change': np.round(recent.get('daily_return', 0) * 100, 2),
+        'zscore': recent['zscore'].round(2),
+    })
+    
+    signals = pd.DataFrame({
+        'id': 'sig_' + scheme_code + '_' + recent['date'].dt.strftime('%Y%m%d%H%M'),
+        'timestamp': recent['date'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'type': signal_types['type'],
+        'icon': signal_types['icon'],
+        'color': signal_types['color'],
+        'title': signal_types['title'],
+        'fund_name': _text_or_default(recent, 'scheme_name', scheme_code.replace('', 'Unknown')),
+        'scheme_code': scheme_code,
+        'category': category,
+        'message': _explain(recent),
+        'severity': recent['severity'],
+        'confidence': _confidence_scores(recent['zscore']),
+        'metrics': pd.Series(metrics.to_dict('records'), index=recent.index, dtype=object),
+    })
+    
+    return signals.to_dict('records')
 
 
-def _determine_signal_type(row: pd.Series) -> Dict:
-    """Determine signal type and styling based on anomaly characteristics."""
-    severity = row.get('severity', 'medium')
-    direction = row.get('anomaly_direction', 'down')
-    category = row.get('category', 'Unknown')
-    
-    if severity == 'high' and direction == 'down':
-        return {
-            'type': 'critical',
-            'icon': '⚠️',
-            'color': 'red',
-            'title': f'{category} fund major drop detected'
-        }
-    elif severity == 'high' and direction == 'up':
-        return {
-            'type': 'alert',
-            'icon': '📈',
-            'color': 'yellow',
-            'title': f'{category} fund unusual spike'
-        }
-    elif direction == 'down':
-        return {
-            'type': 'warning',
-            'icon': '📉',
-            'color': 'orange',
-            'title': f'{category} fund volatility alert'
-        }
-    else:
-        return {
-            'type': 'info',
-            'icon': '📊',
-            'color': 'blue',
-            'title': f'{category} fund movement detected'
-        }
+def _determine_signal_types(recent: pd.DataFrame, category: pd.Series) -> pd.DataFrame:
+    """Determine signal type and styling for each anomaly via SIGNAL_TYPES."""
+    keys = pd.DataFrame({
+        'severity': recent['severity'].astype(str),
+        'direction': recent['anomaly_direction'].astype(str),
+    })
+    styles = keys.merge(SIGNAL_TYPES, on=['severity', 'direction'], how='left')
+    styles = styles.fillna(DEFAULT_SIGNAL_TYPE)
+    styles.index = recent.index
+    # Align dtypes: after the merge title_suffix is object, category may be str
+    styles['title'] = category.astype(str) + ' ' + styles['title_suffix'].astype(str)
+    return styles[['type', 'icon', 'color', 'title']]
 
 
 def analyze_fund_risk(df: pd.DataFrame, scheme_code: str) -> Dict:
     """Analyze risk metrics for a specific fund."""
-    fund_df = df[df['scheme_code'] == scheme_code].copy()
+    fund_df = df[df['scheme_code'] == scheme_code]
     
     if fund_df.empty:
         return None
     
-    fund_df = fund_df.sort_values('date')
-    
-    # Calculate risk metrics
-    returns = fund_df['daily_return'].dropna()
-    
-    risk_metrics = {
-        'volatility': round(returns.std() * np.sqrt(252) * 100, 2),
-        'max_drawdown': round(fund_df['drawdown'].min() * 100, 2),
-        'sharpe_estimate': round(returns.mean() / returns.std() * np.sqrt(252), 2) if returns.std() > 0 else 0,
-        'anomaly_frequency': round(fund_df['is_anomaly'].mean() * 100, 2) if 'is_anomaly' in fund_df.columns else 0,
-        'avg_anomaly_magnitude': round(fund_df[fund_df.get('is_anomaly', False) == True]['zscore'].abs().mean(), 2) if 'is_anomaly' in fund_df.columns else 0,
-        'risk_score': _calculate_risk_score(fund_df),
-    }
+    return analyze_all_fund_risk(fund_df).get(scheme_code)
+
+
+def analyze_all_fund_risk(df: pd.DataFrame) -> Dict[str, Dict]:
+    """Analyze risk metrics for every fund in one grouped pass."""
+    if 'is_anomaly' not in df.columns:
+        df = detect_anomalies(df)
     
-    return risk_metrics
+    df = df.sort_values(['scheme_code', 'date'])
+    abs_zscore = df['abs_zscore'] if 'abs_zscore' in df.columns else df['zscore'].abs()
+    anomaly_zscore = abs_zscore.where(df['is_anomaly'])
+    
+    stats = df.assign(anomaly_zscore=anomaly_zscore).groupby(
+        'scheme_code', observed=True, sort=False
+    ).agg(
+        return_mean=('daily_return', 'mean'),
+        return_std=('daily_return', 'std'),
+        max_drawdown=('drawdown', 'min'),
+        anomaly_rate=('is_anomaly', 'mean'),
+        avg_anomaly_magnitude=('anomaly_zscore', 'mean'),
+        latest_volatility=('volatility', 'last'),
+    )
+    
+    return_std = stats['return_std'].to_numpy()
+    has_spread = return_std > 0
+    sharpe = np.where(
+        has_spread,
+        stats['return_mean'].to_numpy() / np.where(has_spread, return_std, 1.0) * np.sqrt(252),
+        0.0
+    )
+    
+    risk = pd.DataFrame({
+        'volatility': (stats['return_std'] * np.sqrt(252) * 100).round(2),
+        'max_drawdown': (stats['max_drawdown'] * 100).round(2),
+        'sharpe_estimate': np.round(sharpe, 2),
+        'anomaly_frequency': (stats['anomaly_rate'] * 100).round(2),
+        'avg_anomaly_magnitude': stats['avg_anomaly_magnitude'].fillna(0).round(2),
+        'risk_score': _calculate_risk_scores(stats['latest_volatility'], stats['anomaly_rate']),
+    }, index=stats.index.astype(str))
+    
+    return risk.to_dict('index')
 
 
-def _calculate_risk_score(df: pd.DataFrame) -> str:
-    """Calculate overall risk score for a fund."""
-    volatility = df['volatility'].iloc[-1] if 'volatility' in df.columns else 0
-    anomaly_rate = df.get('is_anomaly', pd.Series([False])).mean()
-    
-    score = 0
-    if volatility > 0.3:
-        score += 3
-    elif volatility > 0.2:
-        score += 2
-    elif volatility > 0.1:
-        score += 1
-    
-    if anomaly_rate > 0.1:
-        score += 3
-    elif anomaly_rate > 0.05:
-        score += 2
-    elif anomaly_rate > 0.02:
-        score += 1
-    
-    if score >= 5:
-        return 'High'
-    elif score >= 3:
-        return 'Medium'
-    else:
-        return 'Low'
+def _calculate_risk_scores(volatility: pd.Series, anomaly_rate: pd.Series) -> np.ndarray:
+    """Calculate overall risk score for each fund."""
+    volatility_score = np.select(
+        [volatility > 0.3, volatility > 0.2, volatility > 0.1], [3, 2, 1], default=0
+    )
+    anomaly_score = np.select(
+        [anomaly_rate > 0.1, anomaly_rate > 0.05, anomaly_rate > 0.02], [3, 2, 1], default=0
+    )
+    score = volatility_score + anomaly_score
+    
+    return np.select([score >= 5, score >= 3], ['High', 'Medium'], default='Low')
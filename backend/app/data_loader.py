@@ -5,10 +5,16 @@ Loads historical NAV data from parquet file, computes rolling metrics.
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import re
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
+from numba import njit
+
+from .anomaly import analyze_all_fund_risk, detect_anomalies
 
 # Data path - parquet file
 DATA_DIR = Path(__file__).resolve().parent.parent / "data" / "nav"
@@ -19,20 +25,69 @@ MAX_FUNDS = 200          # Limit number of funds for fast loading
 MAX_ROWS_PER_SCHEME = 60 # Only keep latest 60 NAV records per fund
 MAX_DETAIL_POINTS = 60   # Chart detail points
 
+# Common source column name variations (after normalization)
+COLUMN_MAPPING = {
+    'code': 'scheme_code',
+    'fund_code': 'scheme_code',
+    'scheme': 'scheme_code',
+    'scheme_code': 'scheme_code',
+    'scheme_code_id': 'scheme_code',
+    'schemeid': 'scheme_code',
+    'scheme_id': 'scheme_code',
+    'scheme_code_no': 'scheme_code',
+    'name': 'scheme_name',
+    'fund_name': 'scheme_name',
+    'category_name': 'category',
+    'scheme_category': 'category',
+    'fund_category': 'category',
+    'value': 'nav',
+    'net_asset_value': 'nav',
+}
+
+# Column name normalization: regex for the general case, translate table for ASCII
+_COLUMN_NAME_RE = re.compile(r"[^a-z0-9]+")
+_COLUMN_NAME_TABLE = str.maketrans({
+    chr(c): "_" for c in range(128) if not (chr(c).isdigit() or "a" <= chr(c) <= "z")
+})
+
+# Columns load_nav_data uses once names are normalized and mapped
+NAV_SOURCE_COLUMNS = {'scheme_code', 'scheme_name', 'category', 'fund_type', 'date', 'nav'}
+
+# Processed columns also cached as an Arrow table for per-fund slicing
+PROCESSED_TABLE_COLUMNS = [
+    'date', 'nav', 'daily_return', 'zscore', 'abs_zscore', 'volatility', 'drawdown',
+]
+
 # Cache for loaded data
 _nav_cache: Optional[pd.DataFrame] = None
 _scheme_cache: Optional[pd.DataFrame] = None
 _processed_cache: Optional[pd.DataFrame] = None
+_processed_table: Optional[pa.Table] = None
+_scheme_ranges: Optional[Dict[str, slice]] = None
+_latest_cache: Optional[pd.DataFrame] = None
+_risk_cache: Optional[Dict[str, Dict]] = None
+_fund_list_cache: Optional[List[Dict]] = None
+_fund_category_index: Optional[Dict[str, List[Dict]]] = None
 _overview_cache: Optional[Dict] = None
+_heatmap_cache: Optional[Dict] = None
 
 
 def _clear_cache():
     """Clear all cached data to force reload."""
     global _nav_cache, _scheme_cache, _processed_cache, _overview_cache
+    global _processed_table, _scheme_ranges, _latest_cache, _risk_cache
+    global _fund_list_cache, _fund_category_index, _heatmap_cache
     _nav_cache = None
     _scheme_cache = None
     _processed_cache = None
+    _processed_table = None
+    _scheme_ranges = None
+    _latest_cache = None
+    _risk_cache = None
+    _fund_list_cache = None
+    _fund_category_index = None
     _overview_cache = None
+    _heatmap_cache = None
 
 
 def _safe_str(value, default: str) -> str:
@@ -62,13 +117,85 @@ def _safe_str(value, default: str) -> str:
     return default
 
 
-def _safe_float(value, default: float = 0.0) -> float:
-    """Return a finite float value for API responses."""
-    try:
-        val = float(value)
-    except Exception:
-        return default
-    return val if np.isfinite(val) else default
+def _sanitize_frame(
+    df: pd.DataFrame,
+    num_cols: List[str],
+    str_defaults: Dict[str, str]
+) -> pd.DataFrame:
+    """
+    Return a copy of df with JSON-safe columns for API responses.
+    Numeric columns get non-finite values replaced by 0; string columns follow
+    _safe_str, evaluated once per distinct value. Missing columns are filled.
+    """
+    df = df.copy()
+    
+    for col in num_cols:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            df[col] = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        else:
+            df[col] = 0.0
+    
+    for col, default in str_defaults.items():
+        if col in df.columns:
+            codes, uniques = pd.factorize(df[col])
+            cleaned = np.array([_safe_str(v, default) for v in uniques] + [default], dtype=object)
+            df[col] = cleaned[codes]  # code -1 (missing) picks the trailing default
+        else:
+            df[col] = default
+    
+    return df
+
+
+def _finite(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Return values as floats with non-finite entries replaced by 0."""
+    values = pc.cast(values, pa.float64())
+    return pc.if_else(pc.is_finite(values), values, 0.0)
+
+
+def _normalize_column_name(name) -> str:
+    """Lowercase a column name and collapse non-alphanumerics to underscores."""
+    name = str(name).lower().strip()
+    if name.isascii():
+        return "_".join(part for part in name.translate(_COLUMN_NAME_TABLE).split("_") if part)
+    return _COLUMN_NAME_RE.sub("_", name).strip("_")
+
+
+def _resolve_parquet_columns(path: Path) -> List[str]:
+    """
+    Select the parquet columns load_nav_data needs, in file order.
+    Keeps the first column (scheme_code fallback) and anything the scheme/date
+    detection may pick up; pandas index columns are restored automatically.
+    """
+    schema = pq.ParquetFile(path).schema_arrow
+    metadata = schema.pandas_metadata or {}
+    index_columns = {c for c in metadata.get('index_columns', []) if isinstance(c, str)}
+    data_columns = [c for c in schema.names if c not in index_columns]
+    
+    selected = []
+    for position, name in enumerate(data_columns):
+        normalized = _normalize_column_name(name)
+        if (
+            position == 0
+            or COLUMN_MAPPING.get(normalized, normalized) in NAV_SOURCE_COLUMNS
+            or any(key in normalized for key in ('date', 'code', 'scheme'))
+        ):
+            selected.append(name)
+    return selected
+
+
+def _is_mostly_date_like(series: pd.Series, threshold: float = 0.8) -> bool:
+    """Check whether most sampled values of a column parse as dates."""
+    sample = series.dropna().astype(str).head(200)
+    if sample.empty:
+        return False
+    # ISO8601 keeps parsing on the C fast path instead of per-value dateutil
+    parsed = pd.to_datetime(sample, errors='coerce', format='ISO8601', cache=True)
+    if parsed.notna().mean() > threshold:
+        return True
+    # Fall back to per-value parsing for e.g. AMFI-style '01-04-2023' / '01-Apr-2023'
+    parsed = pd.to_datetime(sample, errors='coerce', format='mixed', cache=True)
+    return parsed.notna().mean() > threshold
 
 
 def load_nav_data() -> pd.DataFrame:
@@ -82,11 +209,18 @@ def load_nav_data() -> pd.DataFrame:
         # Generate sample data if file doesn't exist
         print(f"⚠️ Parquet file not found at {PARQUET_FILE}")
         print("   Generating sample data for demo...")
-        _nav_cache = generate_sample_nav_data()
+        df = generate_sample_nav_data()
+        df['scheme_code'] = df['scheme_code'].astype('category')
+        _nav_cache = df
         return _nav_cache
     
     print(f"📊 Loading NAV data from {PARQUET_FILE}")
-    df = pd.read_parquet(PARQUET_FILE)
+    df = pd.read_parquet(
+        PARQUET_FILE,
+        engine='pyarrow',
+        columns=_resolve_parquet_columns(PARQUET_FILE),
+        use_threads=True
+    )
     
     # Reset index if scheme_code is stored as index (e.g., "Scheme_Code")
     if df.index.name and 'scheme' in df.index.name.lower():
@@ -94,27 +228,10 @@ def load_nav_data() -> pd.DataFrame:
         print(f"   ↳ Reset index '{df.columns[0]}' to column")
     
     # Standardize column names to lowercase and normalize separators
-    df.columns = [re.sub(r"[^a-z0-9]+", "_", str(c).lower().strip()).strip("_") for c in df.columns]
+    df.columns = [_normalize_column_name(c) for c in df.columns]
     
     # Map common column name variations
-    column_mapping = {
-        'code': 'scheme_code',
-        'fund_code': 'scheme_code',
-        'scheme': 'scheme_code',
-        'scheme_code': 'scheme_code',
-        'scheme_code_id': 'scheme_code',
-        'schemeid': 'scheme_code',
-        'scheme_id': 'scheme_code',
-        'scheme_code_no': 'scheme_code',
-        'name': 'scheme_name',
-        'fund_name': 'scheme_name',
-        'category_name': 'category',
-        'scheme_category': 'category',
-        'fund_category': 'category',
-        'value': 'nav',
-        'net_asset_value': 'nav',
-    }
-    df = df.rename(columns={k: v for k, v in column_mapping.items() if k in df.columns})
+    df = df.rename(columns={k: v for k, v in COLUMN_MAPPING.items() if k in df.columns})
     
     # Ensure required columns exist
     if 'scheme_code' not in df.columns:
@@ -134,13 +251,6 @@ def load_nav_data() -> pd.DataFrame:
     df = df.dropna(subset=['date', 'nav', 'scheme_code'])
 
     # If scheme_code looks like a date column, try to find a better code column
-    def _is_mostly_date_like(series: pd.Series) -> bool:
-        sample = series.dropna().astype(str).head(200)
-        if sample.empty:
-            return False
-        parsed = pd.to_datetime(sample, errors='coerce')
-        return parsed.notna().mean() > 0.8
-
     if _is_mostly_date_like(df['scheme_code']):
         candidate_cols = [c for c in df.columns if 'code' in c or 'scheme' in c]
         for col in candidate_cols:
@@ -153,18 +263,22 @@ def load_nav_data() -> pd.DataFrame:
     # Sort by scheme and date
     df = df.sort_values(['scheme_code', 'date'])
 
-    # Limit to MAX_FUNDS random funds for demo performance
-    unique_schemes = df['scheme_code'].unique()
+    # Limit to MAX_FUNDS funds for demo performance
+    codes, unique_schemes = pd.factorize(df['scheme_code'])
     if len(unique_schemes) > MAX_FUNDS:
-        # Pick a diverse sample of funds
-        np.random.seed(42)  # Reproducible sampling
-        selected_schemes = np.random.choice(unique_schemes, MAX_FUNDS, replace=False)
-        df = df[df['scheme_code'].isin(selected_schemes)]
+        # Pick a diverse, reproducible sample: the schemes with the smallest code hashes
+        hashes = pd.util.hash_array(np.asarray(unique_schemes, dtype=object))
+        selected = np.zeros(len(unique_schemes), dtype=bool)
+        selected[np.argpartition(hashes, MAX_FUNDS)[:MAX_FUNDS]] = True
+        df = df[selected[codes]]
         print(f"   ↳ Sampled {MAX_FUNDS} funds from {len(unique_schemes)} total")
     
     # Keep only latest N records per scheme
     df = df.groupby('scheme_code', group_keys=False).tail(MAX_ROWS_PER_SCHEME)
     
+    # Intern scheme codes; groupby/merge then work on integer codes
+    df['scheme_code'] = df['scheme_code'].astype('category')
+    
     print(f"✅ Loaded {len(df):,} NAV records for {df['scheme_code'].nunique()} funds")
     
     _nav_cache = df
@@ -210,7 +324,7 @@ def load_scheme_details() -> pd.DataFrame:
 
 def generate_sample_nav_data() -> pd.DataFrame:
     """Generate sample NAV data for demo purposes."""
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     schemes = [
         ('MF001', 'Blue Chip Growth Fund'),
@@ -232,30 +346,25 @@ def generate_sample_nav_data() -> pd.DataFrame:
     
     # Generate 2 years of daily data
     dates = pd.date_range(start='2024-01-01', end='2026-02-01', freq='B')
+    n_schemes, n_dates = len(schemes), len(dates)
     
-    records = []
-    for scheme_code, scheme_name in schemes:
-        base_nav = np.random.uniform(50, 500)
-        volatility = np.random.uniform(0.005, 0.025)
-        
-        nav = base_nav
-        for date in dates:
-            # Random walk with occasional spikes (anomalies)
-            change = np.random.normal(0.0003, volatility)
-            
-            # Inject anomalies randomly
-            if np.random.random() < 0.02:
-                change = np.random.choice([-1, 1]) * np.random.uniform(0.03, 0.08)
-            
-            nav = nav * (1 + change)
-            records.append({
-                'scheme_code': scheme_code,
-                'scheme_name': scheme_name,
-                'date': date,
-                'nav': round(nav, 4)
-            })
+    base_nav = rng.uniform(50, 500, n_schemes)
+    volatility = rng.uniform(0.005, 0.025, n_schemes)
+    
+    # Random walk with occasional spikes (anomalies)
+    change = rng.normal(0.0003, volatility[:, None], (n_schemes, n_dates))
+    shock_mask = rng.random((n_schemes, n_dates)) < 0.02
+    shock = rng.choice([-1, 1], (n_schemes, n_dates)) * rng.uniform(0.03, 0.08, (n_schemes, n_dates))
+    change = np.where(shock_mask, shock, change)
+    nav = base_nav[:, None] * np.cumprod(1 + change, axis=1)
     
-    return pd.DataFrame(records)
+    codes, names = zip(*schemes)
+    return pd.DataFrame({
+        'scheme_code': np.repeat(codes, n_dates),
+        'scheme_name': np.repeat(names, n_dates),
+        'date': np.tile(dates, n_schemes),
+        'nav': nav.ravel().round(4),
+    })
 
 
 def generate_sample_scheme_data() -> pd.DataFrame:
@@ -289,7 +398,7 @@ def compute_rolling_metrics(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
     - rolling std
     - z-score
     """
-    global _processed_cache
+    global _processed_cache, _processed_table, _scheme_ranges, _latest_cache
     
     if _processed_cache is not None:
         return _processed_cache
@@ -298,42 +407,121 @@ def compute_rolling_metrics(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
     df = df.sort_values(['scheme_code', 'date'])
     
     # Compute daily returns
-    df['daily_return'] = df.groupby('scheme_code')['nav'].pct_change()
-    
-    # Compute rolling statistics
-    df['rolling_mean'] = df.groupby('scheme_code')['daily_return'].transform(
-        lambda x: x.rolling(window=window, min_periods=5).mean()
-    )
-    df['rolling_std'] = df.groupby('scheme_code')['daily_return'].transform(
-        lambda x: x.rolling(window=window, min_periods=5).std()
-    )
-    
-    # Compute z-score
-    df['zscore'] = (df['daily_return'] - df['rolling_mean']) / df['rolling_std']
-    df['zscore'] = df['zscore'].fillna(0)
+    df['daily_return'] = df.groupby('scheme_code', observed=True)['nav'].pct_change()
+    
+    # Compute rolling statistics and z-score in one pass over each scheme
+    codes = df['scheme_code'].to_numpy()
+    starts = _group_starts(codes)
+    returns = df['daily_return'].to_numpy(dtype=np.float64)
+    rolling_mean = np.empty_like(returns)
+    rolling_std = np.empty_like(returns)
+    zscore = np.empty_like(returns)
+    _rolling_mean_std_z(returns, starts, window, 5, rolling_mean, rolling_std, zscore)
+    df['rolling_mean'] = rolling_mean
+    df['rolling_std'] = rolling_std
+    df['zscore'] = zscore
     
     # Compute volatility (annualized)
-    df['volatility'] = df['rolling_std'] * np.sqrt(252)
+    df['volatility'] = rolling_std * np.sqrt(252)
     
     # Compute drawdown
-    df['cummax'] = df.groupby('scheme_code')['nav'].cummax()
-    df['drawdown'] = (df['nav'] - df['cummax']) / df['cummax']
+    nav = df['nav'].to_numpy(dtype=np.float64)
+    cummax = np.empty_like(nav)
+    drawdown = np.empty_like(nav)
+    _segmented_drawdown(nav, starts, cummax, drawdown)
+    df['cummax'] = cummax
+    df['drawdown'] = drawdown
 
     # Replace non-finite values to keep API responses JSON-safe
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-    df['daily_return'] = df['daily_return'].fillna(0)
-    df['rolling_mean'] = df['rolling_mean'].fillna(0)
-    df['rolling_std'] = df['rolling_std'].fillna(0)
-    df['zscore'] = df['zscore'].fillna(0)
-    df['volatility'] = df['volatility'].fillna(0)
-    df['drawdown'] = df['drawdown'].fillna(0)
+    for col in ('daily_return', 'rolling_mean', 'rolling_std', 'zscore', 'volatility', 'drawdown'):
+        df[col] = np.nan_to_num(df[col].to_numpy(dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+    
+    # Shared by every anomaly threshold check downstream
+    df['abs_zscore'] = np.abs(df['zscore'].to_numpy())
+    
+    # Score anomalies once so every consumer shares the flagged frame
+    df = detect_anomalies(df)
+    
+    # Columnar view of the processed data; rows of a scheme are contiguous
+    _processed_table = pa.Table.from_pandas(df[PROCESSED_TABLE_COLUMNS], preserve_index=False)
+    _scheme_ranges = {
+        str(codes[start]): slice(int(start), int(end))
+        for start, end in zip(starts[:-1], starts[1:])
+    }
     
     _processed_cache = df
+    
+    # Latest record per scheme (data is sorted by scheme and date)
+    _latest_cache = df.groupby('scheme_code', observed=True, sort=False).tail(1).reset_index(drop=True)
     return df
 
 
+def _group_starts(codes: np.ndarray) -> np.ndarray:
+    """Boundaries of runs of equal codes in a sorted array, including the end."""
+    if len(codes) == 0:
+        return np.zeros(1, dtype=np.int64)
+    changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    return np.r_[0, changes, len(codes)]
+
+
+@njit(cache=True)
+def _rolling_mean_std_z(returns, starts, window, min_periods, out_mean, out_std, out_z):
+    """
+    Rolling mean, sample std and z-score over each segment [starts[k], starts[k+1]).
+    Uses a sliding Welford update; non-finite returns (NaN, and the ±inf a zero
+    NAV produces) are skipped like pandas rolling.
+    """
+    for k in range(len(starts) - 1):
+        start = starts[k]
+        end = starts[k + 1]
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        for i in range(start, end):
+            x = returns[i]
+            if np.isfinite(x):
+                count += 1
+                delta = x - mean
+                mean += delta / count
+                m2 += delta * (x - mean)
+            
+            j = i - window
+            if j >= start and np.isfinite(returns[j]):
+                old = returns[j]
+                count -= 1
+                if count == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = old - mean
+                    mean -= delta / count
+                    m2 -= delta * (old - mean)
+            
+            if count >= min_periods:
+                out_mean[i] = mean
+                std = np.sqrt(max(m2, 0.0) / (count - 1)) if count > 1 else np.nan
+                out_std[i] = std
+                out_z[i] = (x - mean) / std if std > 0 else np.nan
+            else:
+                out_mean[i] = np.nan
+                out_std[i] = np.nan
+                out_z[i] = np.nan
+
+
+@njit(cache=True)
+def _segmented_drawdown(nav, starts, out_cummax, out_drawdown):
+    """Running NAV peak and drawdown from it over each segment [starts[k], starts[k+1])."""
+    for k in range(len(starts) - 1):
+        peak = -np.inf
+        for i in range(starts[k], starts[k + 1]):
+            if nav[i] > peak:
+                peak = nav[i]
+            out_cummax[i] = peak
+            out_drawdown[i] = (nav[i] - peak) / peak if peak != 0 else np.nan
+
+
 def get_processed_data() -> pd.DataFrame:
-    """Get fully processed NAV data with all metrics."""
+    """Get fully processed NAV data with all metrics and anomaly flags."""
     nav_df = load_nav_data()
     scheme_df = load_scheme_details()
     
@@ -344,102 +532,151 @@ def get_processed_data() -> pd.DataFrame:
     return compute_rolling_metrics(nav_df)
 
 
+def get_latest_per_scheme() -> pd.DataFrame:
+    """Get the latest processed record for each scheme (shared cache, do not mutate)."""
+    get_processed_data()
+    return _latest_cache
+
+
 def get_fund_list() -> List[Dict]:
-    """Get list of all funds with latest metrics."""
-    df = get_processed_data()
+    """Get list of all funds with latest metrics (shared cache, do not mutate)."""
+    global _fund_list_cache
+
+    if _fund_list_cache is not None:
+        return _fund_list_cache
+
     scheme_df = load_scheme_details()
     
     # Get latest record for each scheme
-    latest = df.sort_values('date').groupby('scheme_code').last().reset_index()
+    latest = get_latest_per_scheme().copy()
     
     # Merge with scheme details
     if 'category' not in latest.columns:
         latest = latest.merge(scheme_df[['scheme_code', 'category', 'fund_type']],
                               on='scheme_code', how='left')
 
-    # Normalize string fields to avoid NaN validation errors
-    for col in ['scheme_name', 'category', 'fund_type']:
-        if col in latest.columns:
-            latest[col] = latest[col].fillna('')
-    
-    funds = []
-    for _, row in latest.iterrows():
-        scheme_code = str(row['scheme_code'])
-        fund_name = scheme_code
-        category = _safe_str(row.get('category', ''), 'Unknown')
-        fund_type = _safe_str(row.get('fund_type', ''), 'Unknown')
-
-        funds.append({
-            'scheme_code': scheme_code,
-            'fund_name': fund_name,
-            'category': category,
-            'fund_type': fund_type,
-            'latest_nav': round(_safe_float(row.get('nav', 0)), 2),
-            'daily_return': round(_safe_float(row.get('daily_return', 0)) * 100, 2),
-            'volatility': round(_safe_float(row.get('volatility', 0)) * 100, 2),
-            'anomaly_flag': abs(_safe_float(row.get('zscore', 0))) > 2,
-            'zscore': round(_safe_float(row.get('zscore', 0)), 2),
-            'drawdown': round(_safe_float(row.get('drawdown', 0)) * 100, 2),
-        })
-    
-    return funds
+    # Normalize fields to avoid NaN validation errors
+    latest = _sanitize_frame(
+        latest,
+        ['nav', 'daily_return', 'volatility', 'zscore', 'drawdown'],
+        {'category': 'Unknown', 'fund_type': 'Unknown'}
+    )
+    scheme_code = latest['scheme_code'].astype(str)
+    
+    funds = pd.DataFrame({
+        'scheme_code': scheme_code,
+        'fund_name': scheme_code,
+        'category': latest['category'],
+        'fund_type': latest['fund_type'],
+        'latest_nav': latest['nav'].round(2),
+        'daily_return': (latest['daily_return'] * 100).round(2),
+        'volatility': (latest['volatility'] * 100).round(2),
+        'anomaly_flag': latest['abs_zscore'] > 2,
+        'zscore': latest['zscore'].round(2),
+        'drawdown': (latest['drawdown'] * 100).round(2),
+    })
+    
+    _fund_list_cache = funds.to_dict('records')
+    return _fund_list_cache
+
+
+def get_funds_by_category() -> Dict[str, List[Dict]]:
+    """Get the fund list grouped by lower-cased category (shared cache, do not mutate)."""
+    global _fund_category_index
+
+    if _fund_category_index is not None:
+        return _fund_category_index
+
+    index: Dict[str, List[Dict]] = {}
+    for fund in get_fund_list():
+        index.setdefault(fund['category'].lower(), []).append(fund)
+
+    _fund_category_index = index
+    return _fund_category_index
+
+
+def get_scheme_slice(scheme_code: str) -> Optional[slice]:
+    """Get the row range of a scheme within the processed data."""
+    get_processed_data()
+    return _scheme_ranges.get(scheme_code)
+
+
+def get_fund_frame(scheme_code: str) -> Optional[pd.DataFrame]:
+    """Get the processed rows of one scheme without scanning the full frame."""
+    rows = get_scheme_slice(scheme_code)
+    if rows is None:
+        return None
+    return _processed_cache.iloc[rows]
+
+
+def get_fund_risk(scheme_code: str) -> Optional[Dict]:
+    """Get risk metrics for a fund (computed for all funds once, then cached)."""
+    global _risk_cache
+    
+    if _risk_cache is None:
+        _risk_cache = analyze_all_fund_risk(get_processed_data())
+    
+    return _risk_cache.get(scheme_code)
 
 
 def get_fund_details(scheme_code: str) -> Dict:
     """Get detailed data for a specific fund."""
-    df = get_processed_data()
-    scheme_df = load_scheme_details()
+    fund_df = get_fund_frame(scheme_code)
     
-    fund_df = df[df['scheme_code'] == scheme_code].copy()
-    
-    if fund_df.empty:
+    if fund_df is None:
         return None
     
-    # Get scheme info
-    scheme_info = scheme_df[scheme_df['scheme_code'] == scheme_code]
+    rows = get_scheme_slice(scheme_code)
+    
+    # Get scheme info (merged into the processed rows)
     fund_name = scheme_code
     category = _safe_str(
-        scheme_info['category'].iloc[0] if not scheme_info.empty and 'category' in scheme_info.columns else '',
+        fund_df['category'].iloc[0] if 'category' in fund_df.columns else '',
         'Unknown'
     )
     
     # Prepare history (cap to recent points for responsiveness)
-    fund_df = fund_df.sort_values('date')
-    if MAX_DETAIL_POINTS and len(fund_df) > MAX_DETAIL_POINTS:
-        fund_df = fund_df.tail(MAX_DETAIL_POINTS)
-    
-    history = []
-    anomalies = []
-    
-    for _, row in fund_df.iterrows():
-        record = {
-            'date': row['date'].strftime('%Y-%m-%d'),
-            'nav': round(_safe_float(row.get('nav', 0)), 4),
-            'daily_return': round(_safe_float(row.get('daily_return', 0)) * 100, 4),
-            'zscore': round(_safe_float(row.get('zscore', 0)), 2),
-            'volatility': round(_safe_float(row.get('volatility', 0)) * 100, 2),
-        }
-        history.append(record)
-        
-        if abs(_safe_float(row.get('zscore', 0))) > 2:
-            anomalies.append({
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'nav': round(_safe_float(row.get('nav', 0)), 4),
-                'zscore': round(_safe_float(row.get('zscore', 0)), 2),
-                'severity': 'high' if abs(_safe_float(row.get('zscore', 0))) > 3 else 'medium',
-                'direction': 'up' if _safe_float(row.get('zscore', 0)) > 0 else 'down',
-            })
-    
-    latest = fund_df.iloc[-1]
+    if MAX_DETAIL_POINTS and rows.stop - rows.start > MAX_DETAIL_POINTS:
+        rows = slice(rows.stop - MAX_DETAIL_POINTS, rows.stop)
+    
+    fund = _processed_table.slice(rows.start, rows.stop - rows.start)
+    dates = pc.strftime(fund['date'], format='%Y-%m-%d')
+    nav = _finite(fund['nav'])
+    zscore = _finite(fund['zscore'])
+    abs_zscore = _finite(fund['abs_zscore'])
+    volatility = _finite(fund['volatility'])
+    drawdown = _finite(fund['drawdown'])
+    
+    history = pa.table({
+        'date': dates,
+        'nav': pc.round(nav, 4),
+        'daily_return': pc.round(pc.multiply(_finite(fund['daily_return']), 100), 4),
+        'zscore': pc.round(zscore, 2),
+        'volatility': pc.round(pc.multiply(volatility, 100), 2),
+    }).to_pylist()
+    
+    is_anomaly = pc.greater(abs_zscore, 2)
+    anomaly_zscore = pc.filter(zscore, is_anomaly)
+    anomaly_abs_zscore = pc.filter(abs_zscore, is_anomaly)
+    anomalies = pa.table({
+        'date': pc.filter(dates, is_anomaly),
+        'nav': pc.round(pc.filter(nav, is_anomaly), 4),
+        'zscore': pc.round(anomaly_zscore, 2),
+        'severity': pc.if_else(pc.greater(anomaly_abs_zscore, 3), 'high', 'medium'),
+        'direction': pc.if_else(pc.greater(anomaly_zscore, 0), 'up', 'down'),
+    }).to_pylist()
+    
+    first_nav = nav[0].as_py()
+    latest_nav = nav[-1].as_py()
     
     return {
         'scheme_code': scheme_code,
         'fund_name': fund_name,
         'category': category,
-        'latest_nav': round(_safe_float(latest.get('nav', 0)), 2),
-        'volatility': round(_safe_float(latest.get('volatility', 0)) * 100, 2),
-        'drawdown': round(_safe_float(latest.get('drawdown', 0)) * 100, 2),
-        'total_return': round((_safe_float(latest.get('nav', 0)) / max(_safe_float(fund_df.iloc[0].get('nav', 0)), 1e-9) - 1) * 100, 2),
+        'latest_nav': round(latest_nav, 2),
+        'volatility': round(volatility[-1].as_py() * 100, 2),
+        'drawdown': round(drawdown[-1].as_py() * 100, 2),
+        'total_return': round((latest_nav / max(first_nav, 1e-9) - 1) * 100, 2),
         'history': history,
         'anomalies': anomalies,
         'anomaly_count': len(anomalies),
@@ -456,7 +693,7 @@ def get_overview() -> Dict:
     df = get_processed_data()
     
     # Get latest records
-    latest = df.sort_values('date').groupby('scheme_code').last().reset_index()
+    latest = get_latest_per_scheme().copy()
 
     # Use recent window for realistic headline metrics
     max_date = df['date'].max()
@@ -472,7 +709,7 @@ def get_overview() -> Dict:
         latest['category'] = latest['category'].fillna('Unknown').replace('', 'Unknown')
     
     total_funds = len(latest)
-    funds_in_anomaly = len(latest[latest['zscore'].abs() > 2])
+    funds_in_anomaly = int((latest['abs_zscore'] > 2).sum())
     
     # Category stats (recent window)
     category_stats = recent_df.groupby('category').agg({
@@ -487,7 +724,7 @@ def get_overview() -> Dict:
     
     # Recent anomalies
     recent_anomalies = df[
-        (df['zscore'].abs() > 2) & 
+        (df['abs_zscore'] > 2) & 
         (df['date'] >= df['date'].max() - pd.Timedelta(days=7))
     ].sort_values('date', ascending=False)
     
@@ -514,10 +751,62 @@ def get_overview() -> Dict:
     return _overview_cache
 
 
+def get_heatmap() -> Dict:
+    """Get the fund heatmap payload (shared cache, do not mutate)."""
+    global _heatmap_cache
+
+    if _heatmap_cache is not None:
+        return _heatmap_cache
+
+    funds = get_fund_list()
+    _heatmap_cache = {
+        'data': [
+            {
+                'scheme_code': fund['scheme_code'],
+                'name': fund['fund_name'],
+                'category': fund['category'],
+                'value': fund['daily_return'],
+                'nav': fund['latest_nav'],
+                'anomaly': fund['anomaly_flag'],
+                'zscore': fund['zscore'],
+                'color': _heatmap_color(fund['daily_return'], fund['anomaly_flag']),
+            }
+            for fund in funds
+        ],
+        'categories': list(dict.fromkeys(f['category'] for f in funds)),
+    }
+    return _heatmap_cache
+
+
+def _heatmap_color(daily_return: float, is_anomaly: bool) -> str:
+    """Determine heatmap cell color based on return and anomaly status."""
+    if is_anomaly:
+        return 'anomaly'
+    elif daily_return > 2:
+        return 'strong-positive'
+    elif daily_return > 0.5:
+        return 'positive'
+    elif daily_return > -0.5:
+        return 'neutral'
+    elif daily_return > -2:
+        return 'negative'
+    else:
+        return 'strong-negative'
+
+
 def clear_cache():
     """Clear all cached data."""
     global _nav_cache, _scheme_cache, _processed_cache, _overview_cache
+    global _processed_table, _scheme_ranges, _latest_cache, _risk_cache
+    global _fund_list_cache, _fund_category_index, _heatmap_cache
     _nav_cache = None
     _scheme_cache = None
     _processed_cache = None
+    _processed_table = None
+    _scheme_ranges = None
+    _latest_cache = None
+    _risk_cache = None
+    _fund_list_cache = None
+    _fund_category_index = None
     _overview_cache = None
+    _heatmap_cache = None
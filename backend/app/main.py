@@ -2,20 +2,70 @@
 FastAPI main application for Mutual Fund Anomaly Dashboard.
 """
 
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from .routes import router
+from .routes import router, OrjsonResponse
 from .simulator import simulate_stream, manager
 
+# Runtime settings
+PRELOAD = os.getenv("PRELOAD", "1") == "1"  # Eager-load data at startup
+PORT = int(os.getenv("PORT", "8020"))
+
+def _preload_data():
+    """Load, process and score data ONCE so API calls are instant."""
+    from .data_loader import get_processed_data, get_overview, get_fund_list
+    
+    df = get_processed_data()
+    
+    # Pre-compute overview stats
+    overview = get_overview()
+    
+    # Pre-compute fund list
+    get_fund_list()
+    
+    print(f"✅ Loaded {len(df):,} NAV records for {df['scheme_code'].nunique()} funds")
+    print(f"✅ Overview cached: {overview['total_funds']} funds, {overview['funds_in_anomaly']} anomalies")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize application on startup - EAGER LOAD (unless PRELOAD=0) for fast API responses."""
+    print("🚀 Fund Anomaly API starting up...")
+    
+    if PRELOAD:
+        print("📊 Pre-loading NAV data (this may take a moment)...")
+        try:
+            # The pandas/numba work is blocking, keep it off the event loop
+            await asyncio.to_thread(_preload_data)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not preload data: {e}")
+    else:
+        print("⏭️ Preload disabled, data loads on first request")
+    
+    print(f"🎯 API ready at http://localhost:{PORT}")
+    print(f"📖 Docs available at http://localhost:{PORT}/docs")
+    
+    yield
+    
+    print("👋 Fund Anomaly API shutting down...")
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Fund Anomaly API",
     description="Mutual Fund Anomaly Monitoring Dashboard API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=OrjsonResponse,
+    lifespan=lifespan,
 )
 
 # Configure CORS for frontend
@@ -75,46 +125,22 @@ async def websocket_fund_stream(websocket: WebSocket, scheme_code: str):
         manager.disconnect(websocket)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup - EAGER LOAD for fast API responses."""
-    print("🚀 Fund Anomaly API starting up...")
-    print("📊 Pre-loading NAV data (this may take a moment)...")
-    
-    # Pre-load data at startup so API calls are instant
-    from .data_loader import get_processed_data, get_overview, get_fund_list
-    from .anomaly import detect_anomalies
-    
-    try:
-        # Load and process data ONCE at startup
-        df = get_processed_data()
-        df = detect_anomalies(df)
-        
-        # Pre-compute overview stats
-        overview = get_overview()
-        
-        # Pre-compute fund list
-        funds = get_fund_list()
-        
-        print(f"✅ Loaded {len(df):,} NAV records for {df['scheme_code'].nunique()} funds")
-        print(f"✅ Overview cached: {overview['total_funds']} funds, {overview['funds_in_anomaly']} anomalies")
-    except Exception as e:
-        print(f"⚠️ Warning: Could not preload data: {e}")
-    
-    print("🎯 API ready at http://localhost:8020")
-    print("📖 Docs available at http://localhost:8020/docs")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown."""
-    print("👋 Fund Anomaly API shutting down...")
-
-
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
-        port=8020,
-        reload=True
+        port=PORT,
+        reload=True,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        ws="websockets",
+        # Broadcast payloads are serialized once and shared; compressing them
+        # per connection would redo that work for every client
+        ws_per_message_deflate=False,
+        # Clients only send small control messages; detect dead peers quickly
+        ws_max_size=65536,
+        ws_ping_interval=20.0,
+        ws_ping_timeout=20.0,
+        backlog=2048,
+        timeout_keep_alive=5,
     )
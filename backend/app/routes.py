@@ -2,17 +2,34 @@
 FastAPI routes for the mutual fund anomaly dashboard.
 """
 
+import heapq
+from operator import itemgetter
+
+import orjson
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from pydantic import BaseModel
 
-from .data_loader import get_fund_list, get_fund_details, get_overview, get_processed_data, _clear_cache, DATA_DIR
-from .anomaly import detect_anomalies, get_anomaly_signals, get_recent_anomalies, analyze_fund_risk
+from .data_loader import get_fund_list, get_funds_by_category, get_fund_details, get_fund_risk, get_overview, get_heatmap, get_processed_data, _clear_cache, DATA_DIR
+from .anomaly import get_anomaly_signals, get_recent_anomalies
 
 router = APIRouter()
 
+# Read size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson (also the app's default response class)."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
 
-# Response models
+
+# Response schemas. Routes serving cached, already-sanitized payloads return
+# pre-serialized JSON and list these under `responses` for the OpenAPI docs
+# instead of `response_model`, which would re-validate every item
 class FundSummary(BaseModel):
     scheme_code: str
     fund_name: str
@@ -53,7 +70,7 @@ class AnomalySignal(BaseModel):
     metrics: dict
 
 
-@router.get("/funds", response_model=List[FundSummary])
+@router.get("/funds", response_model=None, responses={200: {"model": List[FundSummary]}})
 async def get_funds(
     category: Optional[str] = Query(None, description="Filter by category"),
     anomaly_only: bool = Query(False, description="Show only funds with anomalies"),
@@ -61,23 +78,28 @@ async def get_funds(
     limit: int = Query(50, description="Maximum number of funds to return")
 ):
     """Get list of all funds with latest metrics."""
-    funds = get_fund_list()
-    
     # Apply filters
     if category:
-        funds = [f for f in funds if f['category'].lower() == category.lower()]
+        funds = get_funds_by_category().get(category.lower(), [])
+    else:
+        funds = get_fund_list()
     
     if anomaly_only:
         funds = [f for f in funds if f['anomaly_flag']]
     
-    # Apply sorting
+    # Apply sorting (only the top `limit` funds are needed)
     if sort_by:
         reverse = sort_by.startswith('-')
         sort_key = sort_by.lstrip('-')
-        if sort_key in funds[0] if funds else []:
-            funds = sorted(funds, key=lambda x: x.get(sort_key, 0), reverse=reverse)
+        if funds and sort_key in funds[0]:
+            key = itemgetter(sort_key)
+            if limit > 0:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return _json_response(select(limit, funds, key=key))
+            # Non-positive limits slice from the end, which needs the full order
+            funds = sorted(funds, key=key, reverse=reverse)
     
-    return funds[:limit]
+    return _json_response(funds[:limit])
 
 
 @router.get("/fund/{scheme_code}")
@@ -88,11 +110,8 @@ async def get_fund(scheme_code: str):
     if not details:
         raise HTTPException(status_code=404, detail=f"Fund {scheme_code} not found")
     
-    # Add risk analysis (compute on the single fund for speed)
-    df = get_processed_data()
-    fund_df = df[df['scheme_code'] == scheme_code]
-    fund_df = detect_anomalies(fund_df)
-    risk_metrics = analyze_fund_risk(fund_df, scheme_code)
+    # Add risk analysis (precomputed for all funds)
+    risk_metrics = get_fund_risk(scheme_code)
     
     if risk_metrics:
         details['risk_metrics'] = risk_metrics
@@ -100,26 +119,25 @@ async def get_fund(scheme_code: str):
     return details
 
 
-@router.get("/overview", response_model=OverviewStats)
+@router.get("/overview", response_model=None, responses={200: {"model": OverviewStats}})
 async def get_dashboard_overview():
     """Get overall dashboard statistics."""
-    return get_overview()
+    return _json_response(get_overview())
 
 
-@router.get("/signals", response_model=List[AnomalySignal])
+@router.get("/signals", response_model=None, responses={200: {"model": List[AnomalySignal]}})
 async def get_signals(
     limit: int = Query(20, description="Maximum number of signals"),
     severity: Optional[str] = Query(None, description="Filter by severity (high, medium)")
 ):
     """Get anomaly signals for the signal feed."""
     df = get_processed_data()
-    df = detect_anomalies(df)
     signals = get_anomaly_signals(df, limit=limit * 2)
     
     if severity:
         signals = [s for s in signals if s['severity'] == severity]
     
-    return signals[:limit]
+    return _json_response(signals[:limit])
 
 
 @router.get("/anomalies")
@@ -129,7 +147,6 @@ async def get_anomalies(
 ):
     """Get list of recent anomalies."""
     df = get_processed_data()
-    df = detect_anomalies(df)
     
     return get_recent_anomalies(df, days=days, limit=limit)
 
@@ -137,26 +154,7 @@ async def get_anomalies(
 @router.get("/heatmap")
 async def get_heatmap_data():
     """Get data for the fund heatmap visualization."""
-    funds = get_fund_list()
-    
-    # Group by category for heatmap
-    heatmap_data = []
-    for fund in funds:
-        heatmap_data.append({
-            'scheme_code': fund['scheme_code'],
-            'name': fund['fund_name'],
-            'category': fund['category'],
-            'value': fund['daily_return'],
-            'nav': fund['latest_nav'],
-            'anomaly': fund['anomaly_flag'],
-            'zscore': fund['zscore'],
-            'color': _get_heatmap_color(fund['daily_return'], fund['anomaly_flag']),
-        })
-    
-    return {
-        'data': heatmap_data,
-        'categories': list(set(f['category'] for f in funds)),
-    }
+    return _json_response(get_heatmap())
 
 
 @router.get("/categories")
@@ -176,20 +174,9 @@ async def health_check():
     }
 
 
-def _get_heatmap_color(daily_return: float, is_anomaly: bool) -> str:
-    """Determine heatmap cell color based on return and anomaly status."""
-    if is_anomaly:
-        return 'anomaly'
-    elif daily_return > 2:
-        return 'strong-positive'
-    elif daily_return > 0.5:
-        return 'positive'
-    elif daily_return > -0.5:
-        return 'neutral'
-    elif daily_return > -2:
-        return 'negative'
-    else:
-        return 'strong-negative'
+def _json_response(content) -> OrjsonResponse:
+    """Encode JSON-safe route data with orjson, bypassing response-model validation."""
+    return OrjsonResponse(content)
 
 
 @router.post("/upload")
@@ -198,20 +185,32 @@ async def upload_nav_file(file: UploadFile = File(...)):
     Upload a NAV file (CSV or Parquet) and return a preview.
     The file is saved for use by the dashboard.
     """
-    import pandas as pd
-    import io
+    import os
+    import tempfile
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
     
     if not file.filename.endswith(('.csv', '.parquet')):
         raise HTTPException(status_code=400, detail="Only CSV and Parquet files are supported")
     
+    is_csv = file.filename.endswith('.csv')
+    tmp_path = None
+    
     try:
-        contents = await file.read()
+        # Stream the upload to disk instead of buffering it in memory
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv' if is_csv else '.parquet') as tmp:
+            tmp_path = tmp.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                tmp.write(chunk)
         
         # Parse the file
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
+        if is_csv:
+            table = pa_csv.read_csv(tmp_path)
         else:
-            df = pd.read_parquet(io.BytesIO(contents))
+            table = pq.read_table(tmp_path)
+        df = table.to_pandas(date_as_object=False, self_destruct=True)
+        del table
         
         # Reset index if scheme_code is stored as index
         if df.index.name and 'scheme' in df.index.name.lower():
@@ -237,7 +236,7 @@ async def upload_nav_file(file: UploadFile = File(...)):
         dest_path = DATA_DIR / "mutual_fund_nav_history.parquet"
         
         # Convert to parquet and save
-        df.to_parquet(dest_path, index=False)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), dest_path, compression='zstd')
         
         # Clear data cache so dashboard loads new file
         _clear_cache()
@@ -253,3 +252,6 @@ async def upload_nav_file(file: UploadFile = File(...)):
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to process file: {str(e)}")
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
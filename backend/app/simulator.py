@@ -7,33 +7,99 @@ import asyncio
 import json
 import random
 from datetime import datetime, timedelta
-from typing import List, Set
+from typing import Dict, List, Set
 import numpy as np
+import orjson
 
 from fastapi import WebSocket
 
+from .anomaly import build_explanations
+
+
+# How long a writer waits for more messages before flushing a batch (seconds)
+BATCH_WINDOW = 0.05
+# Messages buffered per connection before new ones are dropped
+SEND_QUEUE_SIZE = 256
+# Clients that cannot take a frame within this many seconds are disconnected
+SEND_TIMEOUT = 1.0
+
+
+def _encode(message: dict) -> bytes:
+    """Serialize a message; orjson handles datetime timestamps and numpy scalars natively."""
+    return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+
 
 class ConnectionManager:
-    """Manages WebSocket connections."""
+    """
+    Manages WebSocket connections.
+    Each connection gets its own bounded queue drained by a writer task, which
+    sends everything pending as a single JSON array frame. A slow client only
+    fills its own queue; further messages for it are dropped.
+    """
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, asyncio.Queue] = {}
+        self.writers: Dict[WebSocket, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.active_connections[websocket] = queue
+        self.writers[websocket] = asyncio.create_task(self._writer(websocket, queue))
     
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        """Forget a connection; dict removal keeps churn O(1) per client."""
+        self.active_connections.pop(websocket, None)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+    
+    def send(self, websocket: WebSocket, message: dict) -> bool:
+        """Queue a message for one client. Returns False once the client is gone."""
+        queue = self.active_connections.get(websocket)
+        if queue is None:
+            return False
+        try:
+            queue.put_nowait(_encode(message))
+        except asyncio.QueueFull:
+            pass
+        return True
     
     async def broadcast(self, message: dict):
-        """Send message to all connected clients."""
-        for connection in self.active_connections:
+        """Send message to all connected clients without waiting on any of them."""
+        # Serialize once; every queue shares the same bytes
+        payload = _encode(message)
+        for queue in self.active_connections.values():
             try:
-                await connection.send_json(message)
-            except Exception:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
                 pass
+    
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain the connection's queue, sending pending messages in bulk."""
+        try:
+            while True:
+                batch = [await queue.get()]
+                # Give closely spaced messages a chance to share the frame
+                await asyncio.sleep(BATCH_WINDOW)
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                # Messages are already encoded, so the array is just joined bytes;
+                # frames stay text because the browser client JSON.parses strings
+                payload = b'[' + b','.join(batch) + b']'
+                await asyncio.wait_for(websocket.send_text(payload.decode()), timeout=SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("WebSocket send timed out, dropping slow client")
+        except Exception as e:
+            print(f"WebSocket send error: {e}")
+        
+        # Close the socket too, so the endpoint's receive loop ends and the
+        # peer sees the drop instead of a silent stream
+        self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=SEND_TIMEOUT)
+        except Exception:
+            pass
 
 
 # Global connection manager
@@ -54,14 +120,44 @@ SAMPLE_FUNDS = [
     {'code': 'MF010', 'name': 'Global Equity Fund', 'category': 'International', 'base_nav': 445.00},
 ]
 
+# Categories that move with low volatility in the simulation
+LOW_VOLATILITY_CATEGORIES = frozenset({'Debt', 'Gilt'})
+
+# Message templates for simulated anomaly events, formatted on pick
+ANOMALY_EXPLANATIONS = (
+    "Unusual NAV {move} detected",
+    "Significant deviation from rolling mean (z-score: {abs_zscore:.1f})",
+    "{intensity} volatility spike observed",
+    "{category} sector showing abnormal movement",
+)
+
+ANOMALY_SIGNALS = (
+    "{category} fund {event} detected",
+    "Volatility alert: {fund_name}",
+    "Anomaly detected in {category} sector",
+    "Risk alert: {fund_name} deviation",
+)
+
+# Pregenerated random draws for NAV updates, consumed through a cursor.
+# Each update takes one normal and UNIFORMS_PER_UPDATE uniforms.
+RNG_BUFFER_SIZE = 16384
+UNIFORMS_PER_UPDATE = 4
+
+_rng = np.random.default_rng()
+_normals: List[float] = []
+_uniforms: List[float] = []
+_rng_cursor = RNG_BUFFER_SIZE
+
 # Current simulated NAV values
 current_navs = {}
 _simulation_funds = []
+# Per-fund static message fields and volatility, keyed by scheme code
+_fund_templates = {}
 
 
 def _load_simulation_funds():
     """Load simulation funds from dataset; fallback to samples."""
-    global _simulation_funds, current_navs
+    global _simulation_funds, current_navs, _fund_templates
 
     if _simulation_funds:
         return _simulation_funds
@@ -86,22 +182,51 @@ def _load_simulation_funds():
         _simulation_funds = SAMPLE_FUNDS
 
     current_navs = {f['code']: f['base_nav'] for f in _simulation_funds}
+    _fund_templates = {
+        f['code']: {
+            'volatility': 0.005 if f['category'] in LOW_VOLATILITY_CATEGORIES else 0.015,
+            'data': {
+                'scheme_code': f['code'],
+                'fund_name': f['name'],
+                'category': f['category'],
+            },
+        }
+        for f in _simulation_funds
+    }
     return _simulation_funds
 
 
+def _next_nav_draws():
+    """Pop one normal and a block of uniforms from the buffers, refilling as needed."""
+    global _normals, _uniforms, _rng_cursor
+
+    if _rng_cursor >= RNG_BUFFER_SIZE:
+        # Lists of Python floats index faster than NumPy scalars
+        _normals = _rng.standard_normal(RNG_BUFFER_SIZE).tolist()
+        _uniforms = _rng.random(RNG_BUFFER_SIZE * UNIFORMS_PER_UPDATE).tolist()
+        _rng_cursor = 0
+
+    i = _rng_cursor
+    _rng_cursor += 1
+    j = i * UNIFORMS_PER_UPDATE
+    return _normals[i], _uniforms[j:j + UNIFORMS_PER_UPDATE]
+
+
 def generate_nav_update() -> dict:
     """Generate a simulated NAV update for a random fund."""
     funds = _load_simulation_funds()
-    fund = random.choice(funds)
+    normal, (u_fund, u_spike, u_sign, u_size) = _next_nav_draws()
+    fund = funds[int(u_fund * len(funds))]
     code = fund['code']
+    template = _fund_templates[code]
     
     # Simulate price movement
-    volatility = 0.005 if fund['category'] in ['Debt', 'Gilt'] else 0.015
-    change_pct = np.random.normal(0, volatility)
+    volatility = template['volatility']
+    change_pct = normal * volatility
     
     # Occasionally inject larger moves (potential anomalies)
-    if random.random() < 0.05:
-        change_pct = random.choice([-1, 1]) * random.uniform(0.02, 0.05)
+    if u_spike < 0.05:
+        change_pct = (1 if u_sign < 0.5 else -1) * (0.02 + 0.03 * u_size)
     
     new_nav = current_navs[code] * (1 + change_pct)
     current_navs[code] = new_nav
@@ -112,11 +237,9 @@ def generate_nav_update() -> dict:
     
     return {
         'type': 'nav_update',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': datetime.now(),
         'data': {
-            'scheme_code': code,
-            'fund_name': fund['name'],
-            'category': fund['category'],
+            **template['data'],
             'nav': round(new_nav, 4),
             'change_pct': round(change_pct * 100, 3),
             'zscore': round(zscore, 2),
@@ -134,25 +257,12 @@ def generate_anomaly_event() -> dict:
     direction = random.choice(['up', 'down'])
     zscore = random.uniform(2.2, 4.5) * (1 if direction == 'up' else -1)
     
-    explanations = [
-        f"Unusual NAV {'increase' if direction == 'up' else 'decrease'} detected",
-        f"Significant deviation from rolling mean (z-score: {abs(zscore):.1f})",
-        f"{'Major' if severity == 'high' else 'Moderate'} volatility spike observed",
-        f"{fund['category']} sector showing abnormal movement",
-    ]
-    
-    signals = [
-        f"{fund['category']} fund {'spike' if direction == 'up' else 'drop'} detected",
-        f"Volatility alert: {fund['name']}",
-        f"Anomaly detected in {fund['category']} sector",
-        f"Risk alert: {fund['name']} deviation",
-    ]
-    
+    now = datetime.now()
     return {
         'type': 'anomaly',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now,
         'data': {
-            'id': f"anom_{fund['code']}_{datetime.now().strftime('%H%M%S')}",
+            'id': "anom_%s_%02d%02d%02d" % (fund['code'], now.hour, now.minute, now.second),
             'scheme_code': fund['code'],
             'fund_name': fund['name'],
             'category': fund['category'],
@@ -160,8 +270,17 @@ def generate_anomaly_event() -> dict:
             'direction': direction,
             'zscore': round(zscore, 2),
             'nav': round(current_navs[fund['code']], 4),
-            'signal': random.choice(signals),
-            'explanation': random.choice(explanations),
+            'signal': random.choice(ANOMALY_SIGNALS).format(
+                category=fund['category'],
+                fund_name=fund['name'],
+                event='spike' if direction == 'up' else 'drop',
+            ),
+            'explanation': random.choice(ANOMALY_EXPLANATIONS).format(
+                move='increase' if direction == 'up' else 'decrease',
+                abs_zscore=abs(zscore),
+                intensity='Major' if severity == 'high' else 'Moderate',
+                category=fund['category'],
+            ),
             'confidence': round(random.uniform(0.7, 0.95), 2),
         }
     }
@@ -175,7 +294,7 @@ def generate_market_summary() -> dict:
     
     return {
         'type': 'market_summary',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': datetime.now(),
         'data': {
             'total_funds': len(funds),
             'funds_up': total_up,
@@ -187,6 +306,11 @@ def generate_market_summary() -> dict:
     }
 
 
+# Stream event mix: NAV updates (most common), anomaly events, market summaries
+EVENT_GENERATORS = (generate_nav_update, generate_anomaly_event, generate_market_summary)
+EVENT_CUM_WEIGHTS = (0.6, 0.85, 1.0)
+
+
 async def simulate_stream(websocket: WebSocket):
     """
     Main simulation loop for WebSocket streaming.
@@ -196,7 +320,7 @@ async def simulate_stream(websocket: WebSocket):
     
     try:
         # Send initial market summary
-        await websocket.send_json(generate_market_summary())
+        manager.send(websocket, generate_market_summary())
         
         # Counter for periodic events
         tick_count = 0
@@ -205,19 +329,11 @@ async def simulate_stream(websocket: WebSocket):
             tick_count += 1
             
             # Generate event based on probability
-            event_type = random.random()
-            
-            if event_type < 0.6:
-                # NAV update (most common)
-                message = generate_nav_update()
-            elif event_type < 0.85:
-                # Anomaly event
-                message = generate_anomaly_event()
-            else:
-                # Market summary
-                message = generate_market_summary()
+            message = random.choices(EVENT_GENERATORS, cum_weights=EVENT_CUM_WEIGHTS)[0]()
             
-            await websocket.send_json(message)
+            # Stop producing once the writer has dropped the connection
+            if not manager.send(websocket, message):
+                break
             
             # Random delay between 0.5 and 3 seconds
             delay = random.uniform(0.5, 3.0)
@@ -242,8 +358,12 @@ class HistoricalSimulator:
     
     def __init__(self, df):
         self.df = df.sort_values(['date', 'scheme_code'])
+        # Format event timestamps once for the whole frame
+        self.df['timestamp'] = self.df['date'].dt.strftime('%Y-%m-%dT%H:%M:%S')
         self.current_index = 0
-        self.dates = sorted(df['date'].unique())
+        # Split by date once so each batch is a dict lookup, not a full-table scan
+        self._by_date = {d: g for d, g in self.df.groupby('date', sort=True)}
+        self.dates = list(self._by_date.keys())
     
     def reset(self):
         self.current_index = 0
@@ -253,24 +373,53 @@ class HistoricalSimulator:
         if self.current_index >= len(self.dates):
             self.reset()
         
-        events = []
-        current_date = self.dates[self.current_index]
-        date_data = self.df[self.df['date'] == current_date]
+        date_data = self._by_date[self.dates[self.current_index]].head(batch_size)
+        self.current_index += 1
         
-        for _, row in date_data.head(batch_size).iterrows():
-            if row.get('is_anomaly', False):
-                events.append({
-                    'type': 'historical_anomaly',
-                    'timestamp': row['date'].isoformat(),
-                    'data': {
-                        'scheme_code': row['scheme_code'],
-                        'fund_name': row.get('scheme_name', ''),
-                        'nav': round(row['nav'], 4),
-                        'zscore': round(row.get('zscore', 0), 2),
-                        'severity': row.get('severity', 'medium'),
-                        'explanation': row.get('explanation', 'Anomaly detected'),
-                    }
-                })
+        if 'is_anomaly' not in date_data.columns:
+            return []
         
-        self.current_index += 1
-        return events
+        hits = date_data[date_data['is_anomaly'].to_numpy(dtype=bool)]
+        n = len(hits)
+        if n == 0:
+            return []
+        
+        zscore = _column(hits, 'zscore', 0.0).astype(float)
+        severity = _column(hits, 'severity', 'medium').astype(str).astype(object)
+        explanations = build_explanations(
+            zscore,
+            _column(hits, 'daily_return', 0.0).astype(float),
+            np.ones(n, dtype=bool),
+            severity,
+        )
+        
+        return [
+            {
+                'type': 'historical_anomaly',
+                'timestamp': timestamp,
+                'data': {
+                    'scheme_code': code,
+                    'fund_name': name,
+                    'nav': round(nav, 4),
+                    'zscore': round(z, 2),
+                    'severity': sev,
+                    'explanation': text,
+                }
+            }
+            for timestamp, code, name, nav, z, sev, text in zip(
+                hits['timestamp'].tolist(),
+                hits['scheme_code'].tolist(),
+                _column(hits, 'scheme_name', '').tolist(),
+                hits['nav'].to_numpy(dtype=float).tolist(),
+                zscore.tolist(),
+                severity.tolist(),
+                explanations.tolist(),
+            )
+        ]
+
+
+def _column(df, name: str, default) -> np.ndarray:
+    """Column values as an array, or the default repeated when the column is missing."""
+    if name in df.columns:
+        return df[name].to_numpy()
+    return np.full(len(df), default, dtype=object)
@@ -0,0 +1,22 @@
+"""
+Tests for anomaly detection and signal formatting.
+"""
+
+import pandas as pd
+import pytest
+
+from app.anomaly import detect_anomalies, get_anomaly_signals
+
+
+@pytest.mark.parametrize('category_dtype', ['str', object])
+def test_get_anomaly_signals_handles_empty_frame(category_dtype):
+    df = pd.DataFrame({
+        'scheme_code': pd.Series([], dtype='str'),
+        'date': pd.Series([], dtype='datetime64[ns]'),
+        'nav': pd.Series([], dtype=float),
+        'zscore': pd.Series([], dtype=float),
+        'daily_return': pd.Series([], dtype=float),
+        'category': pd.Series([], dtype=category_dtype),
+    })
+    
+    assert get_anomaly_signals(detect_anomalies(df)) == []
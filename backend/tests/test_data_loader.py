@@ -0,0 +1,55 @@
+"""
+Tests for the NAV data loader helpers.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.data_loader import _group_starts, _is_mostly_date_like, _rolling_mean_std_z
+
+
+def _kernel_rolling(returns: pd.Series, codes: np.ndarray, window: int = 20, min_periods: int = 5):
+    values = returns.to_numpy(dtype=np.float64)
+    out_mean = np.empty_like(values)
+    out_std = np.empty_like(values)
+    out_z = np.empty_like(values)
+    _rolling_mean_std_z(values, _group_starts(codes), window, min_periods, out_mean, out_std, out_z)
+    return out_mean, out_std
+
+
+def test_rolling_kernel_matches_pandas_with_non_finite_returns():
+    """A zero NAV makes pct_change emit inf; it must not poison the rest of the fund."""
+    rng = np.random.default_rng(0)
+    nav = 100 * np.cumprod(1 + rng.normal(0, 0.01, 120))
+    nav[40] = 0.0
+    codes = np.repeat(['A', 'B'], 60)
+    
+    returns = pd.Series(nav).groupby(codes).pct_change()
+    returns.iloc[95] = -np.inf
+    returns.iloc[100] = np.nan
+    assert np.isinf(returns).sum() == 2
+    
+    grouped = returns.groupby(codes)
+    expected_mean = grouped.transform(lambda x: x.rolling(20, min_periods=5).mean())
+    expected_std = grouped.transform(lambda x: x.rolling(20, min_periods=5).std())
+    
+    mean, std = _kernel_rolling(returns, codes)
+    
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-9, atol=1e-12, equal_nan=True)
+    # Statistics recover right after the non-finite return
+    assert np.isfinite(mean[42:60]).all()
+    assert np.isfinite(std[42:60]).all()
+
+
+def test_is_mostly_date_like_accepts_iso_and_day_first_dates():
+    assert _is_mostly_date_like(pd.Series(['2023-04-01', '2023-04-15', '2023-06-30']))
+    # AMFI-style day-first dates fall back to per-value parsing
+    assert _is_mostly_date_like(pd.Series(['01-04-2023', '15-04-2023', '30-06-2023']))
+    assert _is_mostly_date_like(pd.Series(['01-Apr-2023', '15-Apr-2023', '30-Jun-2023']))
+
+
+def test_is_mostly_date_like_rejects_scheme_codes_and_names():
+    assert not _is_mostly_date_like(pd.Series(['100001', '100002', '119551']))
+    assert not _is_mostly_date_like(pd.Series(['HDFC Top 100 Fund', 'Axis Bluechip Fund']))
+    assert not _is_mostly_date_like(pd.Series([], dtype=object))
@@ -131,12 +131,16 @@ export class WebSocketManager {
 
       this.ws.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data)
-          this.emit('message', data)
-          
-          // Emit typed events
-          if (data.type) {
-            this.emit(data.type, data.data)
+          const payload = JSON.parse(event.data)
+          // The server batches pending messages into a single array frame
+          const messages = Array.isArray(payload) ? payload : [payload]
+          for (const data of messages) {
+            this.emit('message', data)
+            
+            // Emit typed events
+            if (data.type) {
+              this.emit(data.type, data.data)
+            }
           }
         } catch (e) {
           console.error('Failed to parse WebSocket message:', e)